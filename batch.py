@@ -0,0 +1,373 @@
+# Batch Runner: Streaming JSONL Decisions for Weight-Calculative AI
+# Runs perception scenarios through make_decision in chunks, optionally in parallel, with resumable offsets
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+import ex1
+import ex2
+
+
+def build_fire_ai():
+    """
+    Create a fresh fire scenario AI (Chapter 5, ex1.py)
+    """
+    return ex1.WeightCalculativeAI(ex1.relation_library, ex1.weight_library, ex1.probability_library)
+
+
+def build_alien_ai():
+    """
+    Create a fresh alien ecosystem AI (Chapter 5, ex2.py)
+    """
+    return ex2.AlienEcosystemAI(ex2.relation_library, ex2.weight_library, ex2.probability_library, {})
+
+
+def explain_fire(ai_system):
+    """
+    Fire scenario explanation: the atoms activated by perception and pointing operations
+    """
+    return {'activated_atoms': sorted(ai_system.activated_atoms)}
+
+
+def explain_alien(ai_system):
+    """
+    Alien scenario explanation: the novelty score behind the action weights, plus learned relations as context
+    """
+    return {
+        'novelty_score': ai_system.similarity_scores.get('overall_novelty'),
+        'learned_relations': ai_system.learned_relations,
+    }
+
+
+# Available decision models, by name: (builder, explainer)
+MODELS = {
+    'fire': (build_fire_ai, explain_fire),
+    'alien': (build_alien_ai, explain_alien),
+}
+
+
+def parse_scenario(line, offset):
+    """
+    Parse one JSONL input line into (scenario_id, perception_atoms)
+    Accepts either a bare list of atoms or an object with a "perception" list and optional "id"
+    """
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        raise ValueError(f"Line {offset + 1}: invalid JSON ({exc})")
+
+    if isinstance(record, list):
+        scenario_id, perception = offset, record
+    elif isinstance(record, dict) and isinstance(record.get('perception'), list):
+        scenario_id, perception = record.get('id', offset), record['perception']
+    else:
+        raise ValueError(f"Line {offset + 1}: expected a list of atoms or an object with a 'perception' list")
+
+    # Logical atoms are names; anything else fails deep inside make_decision
+    for atom in perception:
+        if not isinstance(atom, str):
+            raise ValueError(f"Line {offset + 1}: atoms must be strings, got {json.dumps(atom)}")
+
+    return scenario_id, perception
+
+
+def describe_action(action):
+    """
+    Convert an (action, object) tuple into a JSON-friendly dict
+    """
+    return {'action': action[0], 'object': action[1]}
+
+
+def decide_scenario(task):
+    """
+    Run a single scenario through make_decision and build its result record
+    task = (offset, scenario_id, perception_atoms, model, explain)
+    """
+    offset, scenario_id, perception, model, explain = task
+
+    # Each scenario gets its own AI instance so results do not depend on chunking or worker layout
+    build_ai, explain_ai = MODELS[model]
+    ai_system = build_ai()
+
+    # make_decision narrates its reasoning on stdout; capture it instead of mixing it into the output stream
+    trace = io.StringIO()
+    with contextlib.redirect_stdout(trace):
+        best_action, best_weight = ai_system.make_decision(perception)
+
+    result = {
+        'offset': offset,
+        'id': scenario_id,
+        'action': describe_action(best_action) if best_action else None,
+        'weight': best_weight,
+        'weights': [dict(describe_action(action), weight=weight)
+                    for action, weight in ai_system.action_weights.items()],
+    }
+
+    if explain:
+        ranking = sorted(ai_system.action_weights.items(), key=lambda x: x[1], reverse=True)
+        result['explanation'] = explain_ai(ai_system)
+        result['explanation']['ranking'] = [dict(describe_action(action), weight=weight)
+                                            for action, weight in ranking]
+        result['explanation']['trace'] = trace.getvalue().splitlines()
+
+    return result
+
+
+def iter_decision_chunks(lines, model='fire', chunk_size=100, workers=1, explain=False, start_offset=0):
+    """
+    Stream decisions over JSONL lines, yielding (next_offset, results) once per chunk
+    Only one chunk of scenarios is held in memory at a time; lines before start_offset are skipped
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}', expected one of: {', '.join(sorted(MODELS))}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    numbered = itertools.islice(enumerate(lines), start_offset, None)
+
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        while True:
+            chunk = list(itertools.islice(numbered, chunk_size))
+            if not chunk:
+                break
+
+            tasks = []
+            for offset, line in chunk:
+                if not line.strip():
+                    continue  # Blank lines still count towards the offset
+                scenario_id, perception = parse_scenario(line, offset)
+                tasks.append((offset, scenario_id, perception, model, explain))
+
+            if pool is not None:
+                results = pool.map(decide_scenario, tasks)
+            else:
+                results = [decide_scenario(task) for task in tasks]
+
+            yield chunk[-1][0] + 1, results
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def read_checkpoint(checkpoint_path):
+    """
+    Load the checkpoint state dict, or None if there is no checkpoint
+    """
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(checkpoint_path, run, offset, output_bytes):
+    """
+    Atomically record the run settings, the next input offset and the matching output file size
+    """
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(dict(run, offset=offset, output_bytes=output_bytes), f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def resume_position(checkpoint_path, output_path, run):
+    """
+    Work out (offset, output_bytes) to resume from, refusing checkpoints that do not match this run
+    """
+    state = read_checkpoint(checkpoint_path)
+    if state is None:
+        return 0, 0
+
+    for key, value in run.items():
+        if state.get(key) != value:
+            raise ValueError(f"Checkpoint {checkpoint_path} was written with {key}={state.get(key)!r}, "
+                             f"not {value!r}; refusing to resume")
+
+    # Never seek past the end of the output: that would pad it with NUL bytes
+    output_size = os.path.getsize(output_path) if os.path.exists(output_path) else -1
+    if output_size < state['output_bytes']:
+        raise ValueError(f"Checkpoint {checkpoint_path} expects {state['output_bytes']} bytes of output, "
+                         f"but {output_path} is missing or shorter; refusing to resume")
+
+    return state['offset'], state['output_bytes']
+
+
+def run_batch(input_stream, output_path, model='fire', chunk_size=100, workers=1, explain=False,
+              resume=False, checkpoint_path=None, input_name=None):
+    """
+    Run every scenario in input_stream and write JSONL results to output_path
+    A checkpoint is written after each chunk; with resume=True processing restarts from the last one
+    input_name identifies the input in the checkpoint (defaults to the stream's name)
+    Returns the number of scenarios decided in this run
+    """
+    if checkpoint_path is None:
+        checkpoint_path = output_path + '.offset'
+    if input_name is None:
+        input_name = getattr(input_stream, 'name', None)
+
+    # Settings a resumed run must share with the one that wrote the checkpoint
+    run = {'input': input_name, 'model': model, 'explain': explain}
+
+    start_offset, output_bytes = resume_position(checkpoint_path, output_path, run) if resume else (0, 0)
+
+    processed = 0
+    mode = 'r+' if resume and os.path.exists(output_path) else 'w'
+    with open(output_path, mode) as output:
+        # Drop any results written after the last checkpoint (e.g. a chunk interrupted mid-write)
+        output.seek(output_bytes)
+        output.truncate()
+        write_checkpoint(checkpoint_path, run, start_offset, output_bytes)
+
+        for next_offset, results in iter_decision_chunks(input_stream, model, chunk_size, workers,
+                                                         explain, start_offset):
+            for result in results:
+                output.write(json.dumps(result) + '\n')
+            output.flush()
+            os.fsync(output.fileno())
+            write_checkpoint(checkpoint_path, run, next_offset, output.tell())
+            processed += len(results)
+
+    return processed
+
+
+def run_stream(input_stream, output_stream, model='fire', chunk_size=100, workers=1, explain=False,
+               start_offset=0):
+    """
+    Run every scenario in input_stream and write JSONL results to output_stream (no checkpointing)
+    Returns the number of scenarios decided
+    """
+    processed = 0
+    for _, results in iter_decision_chunks(input_stream, model, chunk_size, workers, explain, start_offset):
+        for result in results:
+            output_stream.write(json.dumps(result) + '\n')
+        output_stream.flush()
+        processed += len(results)
+    return processed
+
+
+def self_check():
+    """
+    Self-check: chunking, worker layout, blank-line offsets, resume after interruption and bad-line rejection
+    """
+    import tempfile
+
+    perception = ['smoke', 'high_temperature', 'proximity', 'canned_food', 'scientific_notes', 'body']
+    lines = [json.dumps(perception), '', json.dumps({'id': 'calm', 'perception': ['canned_food']}),
+             json.dumps(['scientific_notes']), '', json.dumps(['smoke', 'body'])]
+    lines = [line + '\n' for line in lines]
+
+    def decide(**options):
+        output = io.StringIO()
+        run_stream(lines, output, **options)
+        return output.getvalue()
+
+    # Same results regardless of chunk size and worker count
+    expected = decide(explain=True)
+    for chunk_size, workers in [(1, 1), (2, 1), (4, 2), (100, 3)]:
+        assert decide(chunk_size=chunk_size, workers=workers, explain=True) == expected, (chunk_size, workers)
+    print("Chunk sizes and worker counts agree")
+
+    # Blank lines count towards offsets
+    results = [json.loads(line) for line in expected.splitlines()]
+    assert [result['offset'] for result in results] == [0, 2, 3, 5]
+    assert [result['id'] for result in results] == [0, 'calm', 3, 5]
+    print("Offsets:", [result['offset'] for result in results])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'results.jsonl')
+        checkpoint_path = output_path + '.offset'
+        full_path = os.path.join(tmp, 'full.jsonl')
+        run_batch(lines, full_path, chunk_size=2, input_name='scenarios')
+        with open(full_path) as f:
+            full_output = f.read()
+
+        # Resume after an interruption mid-chunk: checkpoint after the first chunk, partial second chunk on disk
+        first_chunk = full_output.splitlines(keepends=True)[0]
+        with open(output_path, 'w') as f:
+            f.write(first_chunk + full_output.splitlines(keepends=True)[1][:20])
+        run = {'input': 'scenarios', 'model': 'fire', 'explain': False}
+        write_checkpoint(checkpoint_path, run, 2, len(first_chunk.encode()))
+        run_batch(lines, output_path, chunk_size=2, resume=True, input_name='scenarios')
+        with open(output_path) as f:
+            assert f.read() == full_output
+        print("Resume after interruption reproduces the full output")
+
+        # Resume refuses mismatched settings and a missing output
+        for options in [{'model': 'alien'}, {'explain': True}, {'input_name': 'other'}]:
+            options = dict({'input_name': 'scenarios'}, **options)
+            try:
+                run_batch(lines, output_path, chunk_size=2, resume=True, **options)
+                raise AssertionError(f"resume accepted {options}")
+            except ValueError:
+                pass
+        os.remove(output_path)
+        try:
+            run_batch(lines, output_path, chunk_size=2, resume=True, input_name='scenarios')
+            raise AssertionError("resume accepted a missing output file")
+        except ValueError:
+            pass
+        print("Resume rejects mismatched checkpoints")
+
+    # Bad lines are rejected with a ValueError naming the line
+    for bad_line in ['not json', '42', '{"perception": "smoke"}', '["fire", 1]', '["a", {"x": 1}]']:
+        try:
+            run_stream([json.dumps(['smoke']), bad_line], io.StringIO())
+            raise AssertionError(f"accepted {bad_line!r}")
+        except ValueError as exc:
+            assert str(exc).startswith("Line 2:"), exc
+    print("Bad lines rejected")
+
+    print("Self-check passed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream JSONL perception scenarios through a Weight-Calculative AI")
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default='-',
+                        help="JSONL scenario file, or '-' for stdin (default)")
+    parser.add_argument('-o', '--output', default='-', help="JSONL result file, or '-' for stdout (default)")
+    parser.add_argument('--model', choices=sorted(MODELS), default='fire', help="Decision model (default: fire)")
+    parser.add_argument('--chunk-size', type=int, default=100, help="Scenarios per chunk (default: 100)")
+    parser.add_argument('--workers', type=int, default=1, help="Parallel worker processes (default: 1)")
+    parser.add_argument('--explain', action='store_true', help="Include structured explanations in each result")
+    parser.add_argument('--resume', action='store_true', help="Resume from the checkpoint next to the output file")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <output>.offset)")
+    parser.add_argument('--self-check', action='store_true', help="Run the built-in self-check and exit")
+    args = parser.parse_args(argv)
+
+    if args.self_check:
+        self_check()
+        return
+
+    if args.output == '-' and (args.resume or args.checkpoint):
+        parser.error("--resume and --checkpoint require an output file")
+
+    input_stream = args.input
+    input_name = '-' if input_stream is sys.stdin else os.path.abspath(input_stream.name)
+    try:
+        if args.output == '-':
+            run_stream(input_stream, sys.stdout, args.model, args.chunk_size, args.workers, args.explain)
+        else:
+            run_batch(input_stream, args.output, args.model, args.chunk_size, args.workers, args.explain,
+                      args.resume, args.checkpoint, input_name)
+    except ValueError as exc:
+        parser.exit(1, f"error: {exc}\n")
+    except BrokenPipeError:
+        # The reader closed stdout early (e.g. piped into head); point stdout at devnull so exit stays quiet
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+
+
+if __name__ == "__main__":
+    main()
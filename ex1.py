@@ -11,6 +11,7 @@ class WeightCalculativeAI:
         self.probability_library = probability_library
         self.activated_atoms = set()
         self.central_workspace = []
+        self.action_weights = {}  # Weights from the most recent decision
         
     def pointing_operation(self, source_atom):
         """
@@ -219,6 +220,7 @@ class WeightCalculativeAI:
         for action in possible_actions:
             weight = self.calculate_action_weight(action[0], action[1], self.activated_atoms)
             action_weights[action] = weight
+        self.action_weights = action_weights
         
         # Phase 4: Decision
         if action_weights:
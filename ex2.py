@@ -12,6 +12,7 @@ class AlienEcosystemAI:
         self.earth_knowledge_base = earth_knowledge_base  # Earth biology knowledge
         self.activated_atoms = set()
         self.central_workspace = []
+        self.action_weights = {}  # Weights from the most recent decision
         self.learned_relations = {}  # Dynamically learned relationships
         self.similarity_scores = {}
         
@@ -273,6 +274,7 @@ class AlienEcosystemAI:
         for action in possible_actions:
             weight = self.calculate_action_weight(action, self.activated_atoms)
             action_weights[action] = weight
+        self.action_weights = action_weights
         
         # Phase 5: Decision with explanation
         if action_weights: